@@ -9,18 +9,30 @@ logging.basicConfig(
 )
 
 
+def select_file(files):
+    """Ask the user to pick one of the listed files and return its name"""
+    while True:
+        # A single int() call both validates and parses the input
+        try:
+            idx = int(input("Enter your choice: ")) - 1
+            if not 0 <= idx < len(files):
+                raise ValueError
+            return files[idx]
+        except ValueError:
+            print(f"Invalid input. Please enter a number between 1 and {len(files)}.")
+
+
 def main():
     """Backup the directories listed in dirs_to_backup.txt to a compressed file"""
 
     # Classes
     backup_manager = BackupManager()
 
-    if not os.path.isfile(backup_manager.config_file_path):
+    if not backup_manager.load_credentials():
         logging.info("Configuration file not found. Creating a new one.")
+        # ask_inputs saves the configuration once the user finishes
         backup_manager.ask_inputs()
-        backup_manager.save_credentials()
     else:
-        backup_manager.load_credentials()
         # Check if directories to backup are configured
         if not backup_manager.dirs_to_backup:
             logging.warning("No directories found in configuration. Setting up now.")
@@ -71,11 +83,8 @@ def main():
             if not files:
                 continue
 
-            choice = int(input("Enter your choice: "))
-
-            # files[choice - 1] -> get file name from list files
             file_to_decrypt = os.path.join(
-                backup_manager.backup_folder, files[choice - 1]
+                backup_manager.backup_folder, select_file(files)
             )
             backup_manager.decrypt(file_to_decrypt)
             backup_manager.verify_decrypt_file(file_to_decrypt)
@@ -90,10 +99,8 @@ def main():
             if not files:
                 continue
 
-            choice = int(input("Enter your choice: "))
-
             file_to_extract = os.path.join(
-                backup_manager.backup_folder, files[choice - 1]
+                backup_manager.backup_folder, select_file(files)
             )
             backup_manager.extract_backup(file_to_extract)
         elif choice == 6:
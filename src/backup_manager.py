@@ -4,18 +4,27 @@ import datetime
 import sys
 import time
 import tarfile
+import tempfile
 import json
 import gettext
 import getpass
 import logging
 import hashlib
 import re
-from typing import List
+import threading
+from typing import List, Optional
 from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 
 _ = gettext.gettext
 
+# Read size used when hashing backup archives
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Backup archives are named <dd-mm-yyyy>.tar.xz, optionally with .enc
+BACKUP_FILE_PATTERN = re.compile(r"(\d{2}-\d{2}-\d{4})\.tar\.xz(\.enc)?")
+
 
 @dataclass
 class BackupManager:
@@ -115,8 +124,10 @@ class BackupManager:
             elif choice == "4":
                 self.modify_ignore_list()
             elif choice == "5":
-                self.save_credentials()
-                print("Configuration saved.")
+                if self.save_credentials():
+                    print("Configuration saved.")
+                else:
+                    print("Configuration unchanged, nothing to save.")
                 break
             else:
                 print("Invalid choice. Please try again.")
@@ -132,7 +143,7 @@ class BackupManager:
             print("\nOptions:")
             print("1. Add ignore paths (separate multiple entries with commas)")
             print("2. Remove an ignore path")
-            print("3. Finish and save")
+            print("3. Finish")
 
             choice = input("Choose an option (1-3): ").strip()
             if choice == "1":
@@ -158,18 +169,14 @@ class BackupManager:
                 except ValueError:
                     print("Invalid input.")
             elif choice == "3":
-                self.save_credentials()
-                print("Ignore list updated and saved.")
+                # Saved together with the directories by configure_directories
+                print("Ignore list updated.")
                 break
             else:
                 print("Invalid choice. Please try again.")
 
-    def save_credentials(self):
-        """Save the credentials to a file in json format from response"""
-
-        # Ensure the directory for the config file exists
-        config_dir = os.path.dirname(self.config_file_path)
-        os.makedirs(config_dir, exist_ok=True)
+    def save_credentials(self) -> bool:
+        """Save the credentials to a file in json format, return False if unchanged"""
 
         config = {
             "backup_folder": self.backup_folder,
@@ -179,36 +186,71 @@ class BackupManager:
             "ignore_list": self.ignore_list,
         }
 
-        with open(self.config_file_path, "w", encoding="utf-8") as config_file:
-            json.dump(config, config_file, indent=4)
+        payload = json.dumps(config, indent=4)
+
+        # Resolve symlinks so a linked config.json (e.g. kept in a dotfiles
+        # repo) stays a link and its target is what gets updated
+        config_path = os.path.realpath(self.config_file_path)
+
+        # Nothing changed since the last save, skip the write
+        try:
+            with open(config_path, "r", encoding="utf-8") as config_file:
+                if config_file.read() == payload:
+                    return False
+                mode = os.fstat(config_file.fileno()).st_mode & 0o7777
+        except FileNotFoundError:
+            # First save: ensure the directory for the config file exists.
+            # An existing config.json implies its directory already does.
+            os.makedirs(os.path.dirname(config_path), exist_ok=True)
+            # Same permissions open(..., "w") would have created it with
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+
+        # Write to a temporary file and rename it over the config so an
+        # interrupted save never leaves a truncated config.json behind
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(config_path), suffix=".tmp")
+        try:
+            # mkstemp creates the file as 0600, keep the config's own mode
+            os.chmod(tmp_path, mode)
+            with os.fdopen(fd, "w", encoding="utf-8") as config_file:
+                config_file.write(payload)
+                # Make the data durable before the rename makes it visible
+                config_file.flush()
+                os.fsync(config_file.fileno())
+            os.replace(tmp_path, config_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
 
         print(f"Configuration file created at {self.config_file_path}")
         print(f"Updated number of backups to keep to {self.keep_backup}")
         print(f"Updated number of .enc backups to keep to {self.keep_enc_backup}")
-        self.load_credentials()
-
-    def load_credentials(self):
-        """Load the credentials from a file and update the class attributes"""
-        config_path = os.path.expanduser(self.config_file_path)
+        return True
 
-        if os.path.exists(config_path):
+    def load_credentials(self) -> bool:
+        """Load the credentials from a file, return False if there is none"""
+        # Open directly instead of checking existence first: one syscall less
+        try:
             with open(self.config_file_path, "r") as config_file:
                 config = json.load(config_file)
+        except FileNotFoundError:
+            # The caller reports the missing file and starts the setup
+            return False
 
-            self.backup_folder = config.get("backup_folder", self.backup_folder)
-            self.keep_backup = config.get("keep_backup", self.keep_backup)
-            self.keep_enc_backup = config.get("keep_enc_backup", self.keep_enc_backup)
-            self.dirs_to_backup = config.get("dirs_to_backup", self.dirs_to_backup)
-            self.ignore_list = config.get("ignore_list", self.ignore_list)
-
-            print(f"Configuration loaded from {self.config_file_path}")
-            print(f"Backup folder set to {self.backup_folder}")
-            print(f"Keep backup: {self.keep_backup}")
-            print(f"Keep encrypted backup: {self.keep_enc_backup}")
-            print(f"Directories to backup: {self.dirs_to_backup}")
-            print(f"Ignore list: {self.ignore_list}")
-        else:
-            print(f"Configuration file {self.config_file_path} not found.")
+        self.backup_folder = config.get("backup_folder", self.backup_folder)
+        self.keep_backup = config.get("keep_backup", self.keep_backup)
+        self.keep_enc_backup = config.get("keep_enc_backup", self.keep_enc_backup)
+        self.dirs_to_backup = config.get("dirs_to_backup", self.dirs_to_backup)
+        self.ignore_list = config.get("ignore_list", self.ignore_list)
+
+        print(f"Configuration loaded from {self.config_file_path}")
+        print(f"Backup folder set to {self.backup_folder}")
+        print(f"Keep backup: {self.keep_backup}")
+        print(f"Keep encrypted backup: {self.keep_enc_backup}")
+        print(f"Directories to backup: {self.dirs_to_backup}")
+        print(f"Ignore list: {self.ignore_list}")
+        return True
 
     def check_backup_exist(self) -> bool:
         """Check if a backup file already exists for today"""
@@ -268,8 +310,13 @@ class BackupManager:
             )
 
             while proc.poll() is None:
-                if os.path.exists(self.backup_file_path):
-                    current_size = os.path.getsize(self.backup_file_path)
+                # A single stat both checks the archive exists and sizes it
+                try:
+                    current_size = os.stat(self.backup_file_path).st_size
+                except FileNotFoundError:
+                    current_size = 0
+                # Only touch the progress bar when the archive has grown
+                if current_size > pbar.n:
                     pbar.update(
                         current_size - pbar.n
                     )  # Update the progress bar with the difference
@@ -402,29 +449,44 @@ class BackupManager:
             logging.info("Decryption cancelled")
             sys.exit(0)
 
+    def get_file_hash(self, file_path: str) -> str:
+        """Compute the SHA256 checksum of a file"""
+        # Unbuffered: we already read in large chunks
+        with open(file_path, "rb", buffering=0) as f:
+            # One-shot sequential read: ask for aggressive readahead and
+            # drop the pages afterwards instead of evicting hotter ones
+            fadvise = getattr(os, "posix_fadvise", None)
+            if fadvise:
+                fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            try:
+                # Same loop as hashlib.file_digest, but with our chunk size:
+                # one reused buffer instead of a new bytes object per read
+                hasher = hashlib.sha256()
+                buffer = bytearray(HASH_CHUNK_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    size = f.readinto(buffer)
+                    if not size:
+                        break
+                    hasher.update(view[:size])
+                return hasher.hexdigest()
+            finally:
+                if fadvise:
+                    fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
     def verify_decrypt_file(self, file_to_decrypt: str):
         """Verify the decrypted file is the same as the original file"""
         original_file_path = file_to_decrypt[:-4]
 
-        # Compute the SHA256 checksum of the decrypted file
-        hasher = hashlib.sha256()
-        with open(self.decrypt_file_path, "rb") as f:
-            while True:
-                data = f.read(65536)
-                if not data:
-                    break
-                hasher.update(data)
-        actual_checksum = hasher.hexdigest()
-
-        # Compute the SHA256 checksum of the original file
-        hasher_original = hashlib.sha256()
-        with open(original_file_path, "rb") as f:
-            while True:
-                data = f.read(65536)
-                if not data:
-                    break
-                hasher_original.update(data)
-        expected_checksum = hasher_original.hexdigest()
+        # Files of different sizes cannot match, no need to hash them
+        if os.path.getsize(self.decrypt_file_path) != os.path.getsize(
+            original_file_path
+        ):
+            logging.error("File integrity check failed: file sizes do not match")
+            return
+
+        actual_checksum = self.get_file_hash(self.decrypt_file_path)
+        expected_checksum = self.get_file_hash(original_file_path)
 
         # Compare the checksums
         if actual_checksum == expected_checksum:
@@ -436,22 +498,22 @@ class BackupManager:
 
     def delete_old_backups(self):
         """Delete old backup files if there are more than 'keep_backup' files"""
-        # List all backup files in the backup folder
-        backup_files = [
-            f
-            for f in os.listdir(self.backup_folder)
-            if re.match(r"\d{2}-\d{2}-\d{4}\.tar\.xz", f)
-            or re.match(r"\d{2}-\d{2}-\d{4}\.tar\.xz\.enc", f)
-        ]
+        # List backup files in the backup folder, separating .xz and .xz.enc
+        # files in the same pass
+        dated_xz = []
+        dated_enc = []
+        for f in os.listdir(self.backup_folder):
+            match = BACKUP_FILE_PATTERN.fullmatch(f)
+            if match:
+                date = datetime.datetime.strptime(match.group(1), "%d-%m-%Y")
+                if match.group(2):
+                    dated_enc.append((date, f))
+                else:
+                    dated_xz.append((date, f))
 
         # Sort the backup files by date
-        backup_files.sort(
-            key=lambda x: datetime.datetime.strptime(x.split(".")[0], "%d-%m-%Y")
-        )
-
-        # Separate .xz and .xz.enc files
-        xz_files = [f for f in backup_files if f.endswith(".tar.xz")]
-        enc_files = [f for f in backup_files if f.endswith(".tar.xz.enc")]
+        xz_files = [f for _date, f in sorted(dated_xz)]
+        enc_files = [f for _date, f in sorted(dated_enc)]
 
         # Track deleted files to avoid duplicate deletions
         deleted_files = set()
@@ -506,32 +568,62 @@ class BackupManager:
         return ignore_list
 
     def calculate_directory_size(
-        self, directory: str, ignore_paths: List[str] = []
+        self,
+        directory: str,
+        ignore_paths: List[str] = [],
+        cancel_event: Optional[threading.Event] = None,
     ) -> int:
-        """Calculate the total size of a directory, excluding ignored paths"""
+        """Calculate the total size of a directory, excluding ignored paths
+
+        The walk stops early, returning a partial size, once cancel_event is set.
+        """
         total_size = 0
-        ignore_paths_set = set(ignore_paths)
-        for dirpath, dirnames, filenames in os.walk(directory):
-            # Skip ignored directories
-            dirnames[:] = [
-                d
-                for d in dirnames
-                if not any(
-                    os.path.join(dirpath, d).startswith(ignored)
-                    for ignored in ignore_paths_set
-                )
-            ]
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                if not any(
-                    filepath.startswith(ignored) for ignored in ignore_paths_set
-                ):
+        # Walk with os.scandir on bytes paths: each entry's type and stat come
+        # from its DirEntry instead of extra path-based syscalls, and entry
+        # names are never decoded to str. Each pending directory carries only
+        # the ignore paths that can still match below it, so subtrees without
+        # any ignored paths skip the check entirely.
+        pending = [
+            (os.fsencode(directory), tuple(set(map(os.fsencode, ignore_paths))))
+        ]
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            dirpath, ignored_paths = pending.pop()
+            try:
+                entries = os.scandir(dirpath)
+            except OSError:
+                # Unreadable directories are skipped, as os.walk does
+                continue
+            with entries:
+                for entry in entries:
+                    path = entry.path
+                    # Skip ignored directories and files; startswith() checks
+                    # the whole tuple of prefixes in a single C call
+                    if path.startswith(ignored_paths):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        # Don't follow symlinked directories
+                        if not entry.is_symlink():
+                            narrowed = ()
+                            if ignored_paths:
+                                narrowed = tuple(
+                                    ignored
+                                    for ignored in ignored_paths
+                                    if ignored.startswith(path)
+                                )
+                            pending.append((path, narrowed))
+                        continue
                     try:
-                        total_size += os.path.getsize(filepath)
+                        total_size += entry.stat().st_size
                     except FileNotFoundError:
                         continue
                     except Exception as e:
-                        print(f"Error accessing {filepath}: {e}")
+                        print(f"Error accessing {os.fsdecode(path)}: {e}")
                         continue
         return total_size
 
@@ -553,14 +645,46 @@ class BackupManager:
         """Calculate the total size of directories to backup, excluding ignored paths"""
         total_backup_size = 0
         print("\nCalculating sizes for backup directories excluding ignored paths:")
-        for path in tqdm(dirs_to_backup, desc="Processing backup directories"):
-            expanded_path = os.path.expanduser(path)
-            if os.path.isdir(expanded_path):
-                dir_size = self.calculate_directory_size(expanded_path, ignore_list)
+        expanded_paths = [
+            expanded_path
+            for expanded_path in map(os.path.expanduser, dirs_to_backup)
+            if os.path.isdir(expanded_path)
+        ]
+        if not expanded_paths:
+            return total_backup_size
+
+        cancel_event = threading.Event()
+
+        def walk(expanded_path: str) -> int:
+            return self.calculate_directory_size(
+                expanded_path, ignore_list, cancel_event
+            )
+
+        # Each root is an independent tree and the walk spends its time in
+        # scandir/stat syscalls, which release the GIL
+        executor = None
+        if len(expanded_paths) > 1:
+            executor = ThreadPoolExecutor(max_workers=min(8, len(expanded_paths)))
+            dir_sizes = executor.map(walk, expanded_paths)
+        else:
+            dir_sizes = map(walk, expanded_paths)
+
+        try:
+            for expanded_path, dir_size in tqdm(
+                zip(expanded_paths, dir_sizes),
+                total=len(expanded_paths),
+                desc="Processing backup directories",
+            ):
                 total_backup_size += dir_size
                 print(
                     f"Backup Path: {expanded_path}\n  Size: {self.format_size(dir_size)}"
                 )
+        finally:
+            # On Ctrl-C, stop the remaining walks at their next directory
+            # instead of waiting for them to finish
+            cancel_event.set()
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
         return total_backup_size
 
     def calculate_total_ignore_size(self, ignore_list: List[str]) -> int: